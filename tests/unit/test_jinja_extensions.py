@@ -5,7 +5,9 @@ import pytest
 
 from zorn.elements import Page, ZornSettings
 from zorn.errors import PathNotFound
-from zorn.jinja_extensions import Static, Url, ZornReplacementTag
+from zorn.jinja_extensions import (Static, Url, ZornEnvironment,
+                                   ZornReplacementTag)
+from zorn.manifest import PageDependencies, hash_content
 
 
 def test_tag():
@@ -69,3 +71,22 @@ def test_static():
     template = env.get_template('static.html')
     html = template.render()
     assert html == 'This is a static file: /static/something.html'
+
+
+def test_environment_and_url_register_dependencies():
+    fixtures_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+    env = ZornEnvironment(extensions=[Url])
+    test_page_from = Page('test_page1', 'test_page1')
+    test_page_to = Page('Test Page 2', 'test_page2')
+    env.zorn_settings = ZornSettings({
+        'root_dir': '',
+        'project_name': 'test',
+        'pages': [test_page_from, test_page_to],
+    })
+    env.zorn_page = test_page_from
+    env.zorn_dependencies = PageDependencies()
+    env.loader = jinja2.FileSystemLoader(fixtures_dir)
+    env.get_template('url.html').render()
+    with open(os.path.join(fixtures_dir, 'url.html')) as f:
+        assert env.zorn_dependencies.templates == {'url.html': hash_content(f.read())}
+    assert env.zorn_dependencies.pages == {'test_page2': ['Test Page 2', '/test_page2']}
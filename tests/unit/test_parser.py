@@ -44,3 +44,24 @@ def test_admin_parser_unknown_task():
         parser_ = parser.AdminParser(['unknown:task'])
         parser_.add_arguments()
         parser_.parse_arguments()
+
+
+def test_admin_parser_force():
+    parser_ = parser.AdminParser(['generate', '--force'])
+    parser_.add_arguments()
+    parser_.parse_arguments()
+    assert parser_.task_arguments['force'] is True
+
+
+def test_admin_parser_jobs():
+    parser_ = parser.AdminParser(['generate', '--jobs', '4'])
+    parser_.add_arguments()
+    parser_.parse_arguments()
+    assert parser_.task_arguments['jobs'] == 4
+
+
+def test_admin_parser_wrong_number_of_jobs():
+    with pytest.raises(SystemExit):
+        parser_ = parser.AdminParser(['generate', '--jobs', '0'])
+        parser_.add_arguments()
+        parser_.parse_arguments()
@@ -0,0 +1,48 @@
+import threading
+
+import pytest
+
+from zorn.pipeline import Pipeline
+
+
+def test_pipeline_runs_items_through_all_stages_in_order():
+    pipeline = Pipeline([lambda x: x + 1, lambda x: x * 2, str])
+    assert list(pipeline.run(range(100))) == [str((x + 1) * 2) for x in range(100)]
+
+
+def test_pipeline_keeps_the_number_of_items_in_flight_bounded():
+    lock = threading.Lock()
+    in_flight = {'current': 0, 'max': 0}
+
+    def items():
+        for x in range(200):
+            with lock:
+                in_flight['current'] += 1
+                in_flight['max'] = max(in_flight['max'], in_flight['current'])
+            yield x
+
+    pipeline = Pipeline([lambda x: x, lambda x: x], queue_size=2)
+    for _ in pipeline.run(items()):
+        with lock:
+            in_flight['current'] -= 1
+    assert in_flight['max'] <= 3 * 3
+
+
+def test_pipeline_raises_errors_of_stages():
+    def fail_on_five(x):
+        if x == 5:
+            raise ValueError('five')
+        return x
+
+    results = []
+    with pytest.raises(ValueError):
+        for result in Pipeline([fail_on_five, lambda x: x]).run(range(100)):
+            results.append(result)
+    assert results == [0, 1, 2, 3, 4]
+
+
+def test_pipeline_stops_when_consumer_stops():
+    results = Pipeline([lambda x: x], queue_size=1).run(range(1000))
+    assert next(results) == 0
+    results.close()
+    assert threading.active_count() == 1
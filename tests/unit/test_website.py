@@ -22,6 +22,7 @@ def test_website_with_only_defaults():
                                                           'templates')
     assert website.settings.markdown_dir == os.path.join(website.settings.root_dir, 'md')
     assert website.settings.markdown_extensions == []
+    assert website.settings.templates_cache_dir is None
     assert website.settings.title == 'test_project_name'
     assert website.settings.subtitle == ''
     assert website.settings.description == ''
@@ -198,3 +199,183 @@ def test_website_set_parent_pages():
     sub_pages = [page for page in website.settings.pages if type(pages) is elements.SubPage]
     for sub_page in sub_pages:
         assert sub_page.parent_page in ['test1', 'test2']
+
+
+def test_website_shares_one_environment_between_pages():
+    pages = [elements.Page('Test 1', 'test1'), elements.Page('Test 2', 'test2')]
+    website = elements.Website({
+        'root_dir': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'test_project'),
+        'project_name': 'test_project_name',
+        'pages': pages,
+    })
+    website.generate_pages()
+    assert website.environment.zorn_settings is website.settings
+    assert len(website.environment.cache) == 6
+    for page in pages:
+        os.remove(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'test_project',
+                               '{0}.html'.format(page.file_name)))
+
+
+def test_website_with_templates_cache_dir():
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'test_project', 'cache')
+    pages = [elements.Page('Test', 'test_page')]
+    website = elements.Website({
+        'root_dir': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'test_project'),
+        'project_name': 'test_project_name',
+        'pages': pages,
+        'templates_cache_dir': cache_dir,
+    })
+    website.generate_pages()
+    assert len(os.listdir(cache_dir)) == 6
+    os.remove(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'test_project', 'test_page.html'))
+    shutil.rmtree(cache_dir)
+
+
+def test_generate_pages_skips_unchanged_pages(tmpdir):
+    md_dir = tmpdir.mkdir('md')
+    md_dir.join('test1.md').write('# Test 1')
+    md_dir.join('test2.md').write('# Test 2')
+    settings = {
+        'root_dir': str(tmpdir),
+        'project_name': 'test_project_name',
+        'pages': [elements.Page('Test 1', 'test1'), elements.Page('Test 2', 'test2')],
+        'manifest_path': str(tmpdir.join('.zorn-manifest.json')),
+    }
+    website = elements.Website(settings)
+    website.generate_pages()
+    assert website.stats == {'generated': 2, 'skipped': 0}
+    assert tmpdir.join('.zorn-manifest.json').check()
+
+    website = elements.Website(settings)
+    website.generate_pages()
+    assert website.stats == {'generated': 0, 'skipped': 2}
+
+    md_dir.join('test2.md').write('# Test 2 changed')
+    website = elements.Website(settings)
+    website.generate_pages()
+    assert website.stats == {'generated': 1, 'skipped': 1}
+    assert '<h1>Test 2 changed</h1>' in tmpdir.join('test2.html').read()
+
+    tmpdir.join('test1.html').remove()
+    website = elements.Website(settings)
+    website.generate_pages()
+    assert website.stats == {'generated': 1, 'skipped': 1}
+
+    website = elements.Website(settings)
+    website.generate_pages(force=True)
+    assert website.stats == {'generated': 2, 'skipped': 0}
+
+
+def test_generate_pages_regenerates_all_pages_when_settings_change(tmpdir):
+    settings = {
+        'root_dir': str(tmpdir),
+        'project_name': 'test_project_name',
+        'pages': [elements.Page('Test 1', 'test1'), elements.Page('Test 2', 'test2')],
+        'manifest_path': str(tmpdir.join('.zorn-manifest.json')),
+    }
+    elements.Website(settings).generate_pages()
+    settings['site_title'] = 'A New Title'
+    website = elements.Website(settings)
+    website.generate_pages()
+    assert website.stats == {'generated': 2, 'skipped': 0}
+
+
+def test_generate_pages_records_dependencies(tmpdir):
+    templates_dir = tmpdir.mkdir('templates')
+    templates_dir.join('structure.html').write(
+        "{% if current_page.file_name == 'a' %}{% include 'link.html' %}{% endif %}{{ page_title }}"
+    )
+    templates_dir.join('link.html').write("{% url 'b' %}")
+    settings = {
+        'root_dir': str(tmpdir),
+        'project_name': 'test_project_name',
+        'templates_dir': str(templates_dir),
+        'pages': [elements.Page('A', 'a'), elements.Page('B', 'b'), elements.Page('C', 'c')],
+        'manifest_path': str(tmpdir.join('.zorn-manifest.json')),
+    }
+    website = elements.Website(settings)
+    website.generate_pages()
+    assert website.get_dependents(template='structure.html') == ['a.html', 'b.html', 'c.html']
+    assert website.get_dependents(template='link.html') == ['a.html']
+    assert website.get_dependents(page='b') == ['a.html']
+
+    # changing the title of a page only affects the page itself and the pages which link to it
+    settings['pages'] = [elements.Page('A', 'a'), elements.Page('New B', 'b'), elements.Page('C', 'c')]
+    website = elements.Website(settings)
+    website.generate_pages()
+    assert website.stats == {'generated': 2, 'skipped': 1}
+
+    # changing an included template only affects the pages which included it
+    templates_dir.join('link.html').write("<a href=\"{% url 'b' %}\">b</a>")
+    website = elements.Website(settings)
+    website.generate_pages()
+    assert website.stats == {'generated': 1, 'skipped': 2}
+    assert tmpdir.join('a.html').read() == '<a href="/b">b</a>A'
+
+
+def test_generate_pages_in_parallel_produces_the_same_files(tmpdir):
+    pages = [
+        elements.Page('Home', 'index'),
+        elements.Page('Test', 'test', [elements.SubPage('Sub 1', 'sub1'), elements.SubPage('Sub 2', 'sub2')]),
+        elements.UnlinkedPage('Unlinked', 'unlinked', ['path', 'to']),
+    ]
+    settings = {
+        'root_dir': str(tmpdir),
+        'project_name': 'test_project_name',
+        'url_style': 'nested',
+        'debug': True,
+        'pages': pages,
+    }
+    output_paths = ['index.html', 'test.html', 'test/sub1.html', 'test/sub2.html', 'path/to/unlinked.html']
+
+    elements.Website(settings).generate_pages()
+    serial_output = [tmpdir.join(path).read() for path in output_paths]
+    for path in output_paths:
+        tmpdir.join(path).remove()
+
+    website = elements.Website(settings)
+    website.generate_pages(jobs=3)
+    assert website.stats == {'generated': 5, 'skipped': 0}
+    assert [tmpdir.join(path).read() for path in output_paths] == serial_output
+
+
+def test_generate_pages_in_parallel_reports_errors_per_page(tmpdir):
+    templates_dir = tmpdir.mkdir('templates')
+    templates_dir.join('structure.html').write("{% if page_title != 'Good' %}{% url 'missing' %}{% endif %}")
+    website = elements.Website({
+        'root_dir': str(tmpdir),
+        'project_name': 'test_project_name',
+        'templates_dir': str(templates_dir),
+        'pages': [elements.Page('Good', 'good'), elements.Page('Bad 1', 'bad1'), elements.Page('Bad 2', 'bad2')],
+    })
+    with pytest.raises(errors.GenerationError) as error:
+        website.generate_pages(jobs=2)
+    assert [file_name for file_name, message in error.value.failures] == ['bad1', 'bad2']
+    assert 'PathNotFound' in error.value.failures[0][1]
+    assert tmpdir.join('good.html').check()
+
+
+def test_generate_pages_in_pipeline_produces_the_same_files(tmpdir):
+    md_dir = tmpdir.mkdir('md')
+    md_dir.join('index.md').write('# Home')
+    pages = [
+        elements.Page('Home', 'index'),
+        elements.Page('Test', 'test', [elements.SubPage('Sub 1', 'sub1'), elements.SubPage('Sub 2', 'sub2')]),
+        elements.UnlinkedPage('Unlinked', 'unlinked', ['path', 'to']),
+    ]
+    settings = {
+        'root_dir': str(tmpdir),
+        'project_name': 'test_project_name',
+        'pages': pages,
+    }
+    output_paths = ['index.html', 'test.html', 'sub1.html', 'sub2.html', 'path/to/unlinked.html']
+
+    elements.Website(settings).generate_pages()
+    serial_output = [tmpdir.join(path).read() for path in output_paths]
+    for path in output_paths:
+        tmpdir.join(path).remove()
+
+    website = elements.Website(settings)
+    website.generate_pages(pipeline=True)
+    assert website.stats == {'generated': 5, 'skipped': 0}
+    assert [tmpdir.join(path).read() for path in output_paths] == serial_output
@@ -1,4 +1,6 @@
 import datetime
+import json
+import multiprocessing
 import os
 
 import jinja2
@@ -6,7 +8,9 @@ import markdown
 
 from zorn import errors
 
-from .jinja_extensions import Static, Url
+from .jinja_extensions import Static, Url, ZornEnvironment
+from .manifest import BuildManifest, PageDependencies, hash_content
+from .pipeline import Pipeline
 
 URL_STYLE_FLAT = 'flat'
 URL_STYLE_NESTED = 'nested'
@@ -41,6 +45,12 @@ class ZornSettings:
 
         `markdown_extensions`: extra extensions to feed to the markdown parser - default is no extensions.
 
+        `templates_cache_dir`: a directory where the compiled templates are cached between builds - default is no
+        cache (templates are compiled once per build).
+
+        `manifest_path`: path of the build manifest - if set, only the pages whose markdown, templates or settings
+        changed since the previous build are generated. Default is no manifest (all pages are always generated).
+
         `title`: title of the website - default is the name of the project.
 
         `subtitle`: subtitle of the website - default is no subtitle.
@@ -82,6 +92,12 @@ class ZornSettings:
         self.markdown_extensions = settings['markdown_extensions'] if 'markdown_extensions' in settings_keys \
             else []
 
+        self.templates_cache_dir = settings['templates_cache_dir'] if 'templates_cache_dir' in settings_keys \
+            else None
+
+        self.manifest_path = settings['manifest_path'] if 'manifest_path' in settings_keys \
+            else None
+
         self.title = settings['site_title'] if 'site_title' in settings_keys \
             else self.project_name
 
@@ -106,6 +122,31 @@ class ZornSettings:
         self.pages = all_pages
 
 
+def create_environment(settings):
+    """Create the jinja environment used to render the pages of a website
+
+    Templates are loaded from the templates directory in the settings. If the setting `templates_cache_dir` is set,
+    the compiled templates are also stored there, so later builds only compile templates whose source has changed.
+
+    :param settings: the website's settings
+    :returns: the jinja environment
+    :rtype: ZornEnvironment
+    """
+    bytecode_cache = None
+    if settings.templates_cache_dir is not None:
+        if not os.path.exists(settings.templates_cache_dir):
+            os.makedirs(settings.templates_cache_dir)
+        bytecode_cache = jinja2.FileSystemBytecodeCache(settings.templates_cache_dir)
+
+    env = ZornEnvironment(
+        extensions=[Url, Static],
+        loader=jinja2.FileSystemLoader(settings.templates_dir),
+        bytecode_cache=bytecode_cache,
+    )
+    env.zorn_settings = settings
+    return env
+
+
 class PageAbstraction:
     def __init__(self, title, file_name):
         self.title = title
@@ -118,6 +159,25 @@ class PageAbstraction:
     def __str__(self):
         return self.title
 
+    def get_markdown_path(self, settings):
+        """Return the path to the markdown file with the content of the page
+
+        :param settings: the website settings
+        :returns: path to the markdown file (which may not exist)
+        :rtype: str
+        """
+        return os.path.join(settings.markdown_dir, '{0}.md'.format(self.file_name))
+
+    def describe(self):
+        """Return a description of the page as it is registered in the settings
+
+        Two builds with the same descriptions for all pages have the same navigation and page structure.
+
+        :returns: list with the type, title and file name of the page
+        :rtype: list
+        """
+        return [type(self).__name__, self.title, self.file_name]
+
     def set_content_from_md(self, settings):
         """Sets the page content from its Markdown file
 
@@ -126,26 +186,45 @@ class PageAbstraction:
 
         :param settings: the website settings
         """
-        if os.path.isfile(os.path.join(settings.markdown_dir, '{0}.md'.format(self.file_name))):
-            with open(os.path.join(settings.markdown_dir, '{0}.md'.format(self.file_name))) as f:
-                body_content = f.read()
-                self.body_content = markdown.markdown(
-                    body_content,
-                    extensions=settings.markdown_extensions
-                )
+        self.convert_md(self.read_md(settings), settings)
 
-    def render_html(self, context, settings):
+    def read_md(self, settings):
+        """Read the page's Markdown file
+
+        :param settings: the website settings
+        :returns: the content of the file or `None` if the file doesn't exist
+        """
+        markdown_path = self.get_markdown_path(settings)
+        if os.path.isfile(markdown_path):
+            with open(markdown_path) as f:
+                return f.read()
+        return None
+
+    def convert_md(self, md_content, settings):
+        """Convert Markdown to html and set it as the body content of the page
+
+        :param md_content: the Markdown content of the page or `None` if the page has no Markdown file
+        :param settings: the website settings
+        """
+        if md_content is None:
+            self.body_content = ''
+        else:
+            self.body_content = markdown.markdown(
+                md_content,
+                extensions=settings.markdown_extensions
+            )
+
+    def render_html(self, context, settings, environment=None):
         """Generate the html for the page and save it to `self.html`
 
         :param context: the context dictionary to be passed to the templates
         :param settings: the website's settings
+        :param environment: the jinja environment shared by the pages of the website - if `None` a new one is created
         """
-
-        env = jinja2.Environment(extensions=[Url, Static])
-        env.zorn_settings = settings
-        env.zorn_page = self
-        env.loader = jinja2.FileSystemLoader(settings.templates_dir)
-        template = env.get_template(os.path.join('structure.html'))
+        if environment is None:
+            environment = create_environment(settings)
+        environment.zorn_page = self
+        template = environment.get_template('structure.html')
         self.html = template.render(context)
 
     def save_html(self, site_dir, url_style=URL_STYLE_FLAT):
@@ -156,6 +235,14 @@ class PageAbstraction:
         """
         pass
 
+    def get_output_path(self, url_style=URL_STYLE_FLAT):
+        """Return the path of the html file of the page, relative to the site's directory
+
+        :param url_style: the website's url style
+        :returns: relative path to the html file
+        """
+        pass
+
     def get_path_to_root(self, url_style=URL_STYLE_FLAT, debug=False):
         """Return the path to the root of the website from the page
 
@@ -226,15 +313,16 @@ class Page(PageAbstraction):
             content += '- [{0}]({1})\n'.format(sub_page.title, url)
         return content
 
-    def set_content_from_md(self, settings):
-        """Sets the page content from its Markdown file
+    def convert_md(self, md_content, settings):
+        """Convert Markdown to html and set it as the body content of the page
 
         Extend the method from `PageAbstraction` with an extra step of generating a menu for its subpages if no content
         was found in the markdown files.
 
+        :param md_content: the Markdown content of the page or `None` if the page has no Markdown file
         :param settings: the website settings
         """
-        super().set_content_from_md(settings)
+        super().convert_md(md_content, settings)
         if self.body_content == '' and self.sub_pages != []:
             # Create menu-page in case no content was set for this page
             self.body_content = markdown.markdown(
@@ -252,6 +340,17 @@ class Page(PageAbstraction):
         with open(page_path, 'w+') as f:
             f.write(self.html)
 
+    def get_output_path(self, url_style=URL_STYLE_FLAT):
+        """Return the path of the html file of the page, relative to the site's directory
+
+        :param url_style: the website's url style
+        :returns: relative path to the html file
+        """
+        return '{0}.html'.format(self.file_name)
+
+    def describe(self):
+        return super().describe() + [[sub_page.describe() for sub_page in self.sub_pages]]
+
     def get_path_to_root(self, url_style=URL_STYLE_FLAT, debug=False):
         """Return the path to the root of the website from the page
 
@@ -311,6 +410,15 @@ class SubPage(PageAbstraction):
             with open(page_path, 'w+') as f:
                 f.write(self.html)
 
+    def get_output_path(self, url_style=URL_STYLE_FLAT):
+        if url_style == URL_STYLE_FLAT:
+            return '{0}.html'.format(self.file_name)
+        else:
+            return os.path.join(self.parent_page, '{0}.html'.format(self.file_name))
+
+    def describe(self):
+        return super().describe() + [self.parent_page]
+
     def get_path_to_root(self, url_style=URL_STYLE_FLAT, debug=False):
         if debug is False:
             return '/'
@@ -358,6 +466,12 @@ class UnlinkedPage(PageAbstraction):
         with open(page_path, 'w+') as f:
             f.write(self.html)
 
+    def get_output_path(self, url_style=URL_STYLE_FLAT):
+        return os.path.join(*(self.path + ['{0}.html'.format(self.file_name)]))
+
+    def describe(self):
+        return super().describe() + [self.path]
+
     def get_path_to_root(self, url_style=URL_STYLE_FLAT, debug=False):
         if debug is False:
             return '/'
@@ -371,6 +485,28 @@ class UnlinkedPage(PageAbstraction):
             return from_page.get_path_to_root(url_style, debug) + '/'.join(self.path) + '/' + self.file_name + '.html'
 
 
+# The website generated by the current worker process (see `Website._generate_in_parallel`)
+_worker_website = None
+
+
+def _init_worker(website):
+    global _worker_website
+    _worker_website = website
+
+
+def _generate_page_in_worker(index):
+    """Generate a page of the worker's website
+
+    :param index: the index of the page in the website's pages
+    :returns: tuple with the index, the dependencies of the page (or `None`) and the error message (or `None`)
+    """
+    try:
+        dependencies = _worker_website._generate_page(_worker_website.settings.pages[index])
+    except Exception as e:
+        return index, None, '{0}: {1}'.format(type(e).__name__, e)
+    return index, dependencies, None
+
+
 class Website:
     def __init__(self, settings):
         """Represents a website - acts as the controller for the generation of pages
@@ -378,6 +514,20 @@ class Website:
         :param settings: a ZornSettings object containing the settings of the website
         """
         self.settings = ZornSettings(settings)
+        self.environment = create_environment(self.settings)
+        self.manifest = None
+        self.stats = {}
+
+    def __getstate__(self):
+        # the environment and the manifest are only needed in the process which created them
+        state = self.__dict__.copy()
+        del state['environment']
+        state['manifest'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.environment = create_environment(self.settings)
 
     def _set_parent_pages(self):
         for main_page in self.settings.pages:
@@ -385,40 +535,279 @@ class Website:
                 for sub_page in main_page.sub_pages:
                     sub_page.parent_page = main_page.file_name
 
-    def generate_pages(self):
+    def _get_settings_hash(self):
+        """Return a hash of the settings which affect the html of every page
+
+        This includes the structure of the navigation (which pages feature in it and in which order) and the current
+        year (which is printed in the footer). The titles and urls of the pages are not included, those are
+        registered as dependencies of the pages which link to them.
+
+        :returns: the hexadecimal digest of the settings
+        :rtype: str
+        """
+        return hash_content(json.dumps({
+            'debug': self.settings.debug,
+            'url_style': self.settings.url_style,
+            'templates_dir': self.settings.templates_dir,
+            'static_dir': self.settings.static_dir,
+            'markdown_extensions': self.settings.markdown_extensions,
+            'title': self.settings.title,
+            'subtitle': self.settings.subtitle,
+            'description': self.settings.description,
+            'author': self.settings.author,
+            'keywords': self.settings.keywords,
+            'current_year': datetime.datetime.now().year,
+            'navigation': [
+                [page.file_name, [sub_page.file_name for sub_page in page.sub_pages]]
+                for page in self.settings.pages if type(page) is Page
+            ],
+        }, sort_keys=True, default=repr))
+
+    def _get_record(self, page, manifest, settings_hash):
+        """Return the part of a page's manifest record which can be known before the page is rendered
+
+        :param page: the page
+        :param manifest: the build manifest
+        :param settings_hash: the hash of the settings
+        :returns: dictionary with the hashes of the page's markdown, of its description and of the settings
+        :rtype: dict
+        """
+        return {
+            'source': manifest.hash_source(page.get_markdown_path(self.settings)),
+            'page': hash_content(json.dumps(page.describe())),
+            'settings': settings_hash,
+        }
+
+    def _is_up_to_date(self, page, record, previous):
+        """Check if the html of a page generated in the previous build is still valid
+
+        :param page: the page
+        :param record: the current record of the page (see `_get_record`)
+        :param previous: the record of the page in the previous build
+        :returns: `True` if the page's markdown, the settings, the templates it loaded and the pages it linked to are
+            all the same as in the previous build
+        :rtype: bool
+        """
+        for key in record:
+            if previous.get(key) != record[key]:
+                return False
+        for name, template_hash in previous['templates'].items():
+            if self.environment.get_template_hash(name) != template_hash:
+                return False
+        for file_name, reference in previous['pages'].items():
+            linked_page = self._pages_index.get(file_name)
+            if linked_page is None:
+                return False
+            url = linked_page.get_relative_path(page, self.settings.url_style, self.settings.debug)
+            if [linked_page.title, url] != reference:
+                return False
+        return True
+
+    def get_dependents(self, template=None, page=None):
+        """Return the html files of the last build which depend on a template or on a page
+
+        Only available after `generate_pages` was run for a website with a build manifest.
+
+        :param template: the name of a template (for example `'blocks/nav.html'`)
+        :param page: the file name of a page
+        :returns: sorted list with the paths of the html files, relative to the site's directory
+        :rtype: list
+        """
+        return self.manifest.get_dependents(template, page)
+
+    def _get_context(self, page):
+        """Return the context with which the templates of a page are rendered
+
+        :param page: the page to be rendered
+        :returns: the context dictionary
+        :rtype: dict
+        """
+        # list of links which should have class "active" in nav bar
+        active_nav_links = [page.file_name]
+        if type(page) is SubPage:
+            # if the page in question is a subpage then activate parent too
+            active_nav_links.append(page.parent_page)
+
+        return {
+            'debug': self.settings.debug,
+            'site_description': self.settings.description,
+            'site_author': self.settings.author,
+            'site_keywords': self.settings.keywords,
+            'site_title': self.settings.title,
+            'site_subtitle': self.settings.subtitle.replace(' ', '&nbsp;'),
+            'page_title': page.title,
+            'back_path': ''.join(['../' for _ in range(len(page.path))]) if type(page) is UnlinkedPage else '../',
+            'page_type': type(page).__name__,
+            'body_content': page.body_content,
+            'current_year': datetime.datetime.now().year,
+            'current_page': page,
+            'pages': [page for page in self.settings.pages if type(page) is Page],
+            'active_nav_links': active_nav_links,
+            'url_style': self.settings.url_style,
+        }
+
+    def _render_page(self, page):
+        """Render the html of a page whose content was already set
+
+        :param page: the page to be rendered
+        :returns: the templates and pages the page depends on
+        :rtype: PageDependencies
+        """
+        dependencies = PageDependencies()
+        self.environment.zorn_dependencies = dependencies
+        try:
+            page.render_html(self._get_context(page), self.settings, self.environment)
+        finally:
+            self.environment.zorn_dependencies = None
+        return dependencies
+
+    def _generate_page(self, page):
+        """Generate the html of a page and save it in the correspondent .html file
+
+        :param page: the page to be generated
+        :returns: the templates and pages the page depends on
+        :rtype: PageDependencies
+        """
+        page.set_content_from_md(self.settings)
+        dependencies = self._render_page(page)
+        page.save_html(self.settings.root_dir, url_style=self.settings.url_style)
+        return dependencies
+
+    def _generate_serially(self, pages):
+        """Generate pages one after the other
+
+        :param pages: the pages to be generated
+        :returns: generator of tuples with each page and its dependencies
+        """
+        for page in pages:
+            yield page, self._generate_page(page)
+
+    def _generate_in_pipeline(self, pages):
+        """Generate pages in a pipeline with a stage (and a thread) for each step
+
+        Reading the markdown, converting it, rendering the templates and writing the html happen at the same time for
+        different pages, so the disk and the CPU are used at the same time.
+
+        :param pages: the pages to be generated
+        :returns: generator of tuples with each page and its dependencies
+        """
+        def read(page):
+            return page, page.read_md(self.settings)
+
+        def convert(item):
+            page, md_content = item
+            page.convert_md(md_content, self.settings)
+            return page
+
+        def render(page):
+            return page, self._render_page(page)
+
+        def write(item):
+            page, dependencies = item
+            page.save_html(self.settings.root_dir, url_style=self.settings.url_style)
+            return page, dependencies
+
+        return Pipeline([read, convert, render, write]).run(pages)
+
+    def _generate_in_parallel(self, pages, jobs):
+        """Generate pages in a pool of worker processes
+
+        Where possible the workers are forked, so they start with the settings already loaded and the templates already
+        compiled. Errors are collected and raised together once all pages were processed.
+
+        :param pages: the pages to be generated
+        :param jobs: the number of worker processes
+        :returns: generator of tuples with each page and its dependencies
+        :raises errors.GenerationError: if any page could not be generated
+        """
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('fork')
+        else:
+            context = multiprocessing.get_context()
+
+        # compile the templates before the workers are forked
+        self.environment.get_template('structure.html')
+
+        indexes = {id(page): index for index, page in enumerate(self.settings.pages)}
+        failures = []
+        pool = context.Pool(jobs, _init_worker, (self,))
+        try:
+            results = pool.imap_unordered(
+                _generate_page_in_worker,
+                [indexes[id(page)] for page in pages],
+                max(1, len(pages) // (jobs * 4)),
+            )
+            for index, dependencies, error in results:
+                page = self.settings.pages[index]
+                if error is not None:
+                    failures.append((page.file_name, error))
+                else:
+                    yield page, dependencies
+        finally:
+            pool.terminate()
+            pool.join()
+
+        if len(failures) > 0:
+            raise errors.GenerationError(sorted(failures))
+
+    def generate_pages(self, force=False, jobs=1, pipeline=False):
         """The main method to generate the html of the website
 
         Loops through all the pages and generates their html, saving them in the correspondent .html file.
+
+        If the website has a build manifest, the templates loaded and the pages linked by each page are recorded in
+        it. Pages whose markdown, settings, templates and linked pages are the same as in the previous build (and
+        whose html file still exists) are skipped.
+
+        With more than one job the pages are generated in a pool of processes, producing the same files as a serial
+        build. With a single job, the pages can also be generated in a pipeline of threads (see
+        `_generate_in_pipeline`).
+
+        :param force: if `True`, generate all pages even if they are up to date
+        :param jobs: the number of processes generating pages
+        :param pipeline: if `True` (and there is a single job), generate pages in a pipeline
         """
         self._set_parent_pages()
-        for page in self.settings.pages:
-
-            page.set_content_from_md(self.settings)
-
-            # list of links which should have class "active" in nav bar
-            active_nav_links = [page.file_name]
-            if type(page) is SubPage:
-                # if the page in question is a subpage then activate parent too
-                active_nav_links.append(page.parent_page)
-
-            context = {
-                'debug': self.settings.debug,
-                'site_description': self.settings.description,
-                'site_author': self.settings.author,
-                'site_keywords': self.settings.keywords,
-                'site_title': self.settings.title,
-                'site_subtitle': self.settings.subtitle.replace(' ', '&nbsp;'),
-                'page_title': page.title,
-                'back_path': ''.join(['../' for _ in range(len(page.path))]) if type(page) is UnlinkedPage else '../',
-                'page_type': type(page).__name__,
-                'body_content': page.body_content,
-                'current_year': datetime.datetime.now().year,
-                'current_page': page,
-                'pages': [page for page in self.settings.pages if type(page) is Page],
-                'active_nav_links': active_nav_links,
-                'url_style': self.settings.url_style,
-            }
-
-            page.render_html(context, self.settings)
-
-            page.save_html(self.settings.root_dir, url_style=self.settings.url_style)
+        self._pages_index = {page.file_name: page for page in self.settings.pages}
+        self.environment.zorn_template_hashes.clear()
+        self.stats = {'generated': 0, 'skipped': 0}
+
+        self.manifest = None
+        if self.settings.manifest_path is not None:
+            self.manifest = BuildManifest(self.settings.manifest_path)
+            settings_hash = self._get_settings_hash()
+
+        try:
+            pages = []
+            records = {}
+            for page in self.settings.pages:
+                if self.manifest is not None:
+                    output = page.get_output_path(self.settings.url_style)
+                    record = self._get_record(page, self.manifest, settings_hash)
+                    previous = self.manifest.get_previous(output)
+                    if force is False and previous is not None and self._is_up_to_date(page, record, previous) and \
+                            os.path.isfile(os.path.join(self.settings.root_dir, output)):
+                        self.manifest.update(output, previous)
+                        self.stats['skipped'] += 1
+                        continue
+                    records[output] = record
+                pages.append(page)
+
+            if jobs > 1 and len(pages) > 1:
+                generated = self._generate_in_parallel(pages, jobs)
+            elif pipeline is True:
+                generated = self._generate_in_pipeline(pages)
+            else:
+                generated = self._generate_serially(pages)
+
+            for page, dependencies in generated:
+                self.stats['generated'] += 1
+                if self.manifest is not None:
+                    output = page.get_output_path(self.settings.url_style)
+                    record = records[output]
+                    record['templates'] = dependencies.templates
+                    record['pages'] = dependencies.pages
+                    self.manifest.update(output, record)
+        finally:
+            if self.manifest is not None:
+                self.manifest.save()
@@ -18,6 +18,19 @@ class PathNotFound(PageError):
     pass
 
 
+class GenerationError(PageError):
+    """Indicates that some pages could not be generated
+
+    The `failures` attribute holds a list of tuples with the file name of each page that failed and the error message.
+    """
+    def __init__(self, failures):
+        self.failures = failures
+        super().__init__('{0} page(s) could not be generated:\n{1}'.format(
+            len(failures),
+            '\n'.join('- {0}: {1}'.format(file_name, message) for file_name, message in failures)
+        ))
+
+
 class SettingsError(ZornError):
     """General error for exceptions related with settings"""
     pass
@@ -1,20 +1,63 @@
-from jinja2 import nodes
+from jinja2 import Environment, TemplateNotFound, nodes
 from jinja2.ext import Extension
 
 from zorn.errors import PathNotFound
+from zorn.manifest import hash_content
+
+
+class ZornEnvironment(Environment):
+    def __init__(self, *args, **kwargs):
+        """A jinja environment which keeps track of the templates loaded while rendering a page
+
+        Extend Jinja's Environment. While `zorn_dependencies` is set to a `PageDependencies` object, every template
+        loaded through the environment (including includes and extended templates) is registered there with the hash of
+        its source.
+        """
+        super().__init__(*args, **kwargs)
+        self.zorn_dependencies = None
+        self.zorn_template_hashes = {}
+
+    def get_template_hash(self, name):
+        """Return the hash of the source of a template
+
+        The hashes are memoized - clear `zorn_template_hashes` to have them computed again.
+
+        :param name: the name of the template
+        :returns: the hexadecimal digest of the template's source or `None` if the template doesn't exist
+        """
+        if name not in self.zorn_template_hashes:
+            try:
+                source = self.loader.get_source(self, name)[0]
+            except TemplateNotFound:
+                self.zorn_template_hashes[name] = None
+            else:
+                self.zorn_template_hashes[name] = hash_content(source)
+        return self.zorn_template_hashes[name]
+
+    def _register_template(self, template):
+        if self.zorn_dependencies is not None and template.name is not None:
+            self.zorn_dependencies.add_template(template.name, self.get_template_hash(template.name))
+        return template
+
+    def get_template(self, name, *args, **kwargs):
+        return self._register_template(super().get_template(name, *args, **kwargs))
+
+    def select_template(self, names, *args, **kwargs):
+        return self._register_template(super().select_template(names, *args, **kwargs))
 
 
 class ZornJinjaExtension(Extension):
     def __init__(self, environment):
         """A base extension for a zorn project
 
-        Extend Jinja's Extension and extends the environment to acomodate the settings for the current Zorn project
-        and the current page object (the page to be rendered).
+        Extend Jinja's Extension and extends the environment to acomodate the settings for the current Zorn project,
+        the current page object (the page to be rendered) and the dependencies registered for the current page.
         """
         super().__init__(environment)
         environment.extend(
             zorn_settings=None,
             zorn_page=None,
+            zorn_dependencies=None,
         )
 
 
@@ -44,6 +87,8 @@ class Url(ZornReplacementTag):
     def _get_replacement(self, filename):
         """Take the filename of a page and return the path to that page
 
+        The page is registered as a dependency of the page being rendered.
+
         :param filename:
         :returns: path to page
         :rtype: str
@@ -54,11 +99,14 @@ class Url(ZornReplacementTag):
                 the_page = page
         if the_page is None:
             raise PathNotFound('The page with file name "{0}" was not found for this website.'.format(filename))
-        return the_page.get_relative_path(
+        url = the_page.get_relative_path(
             self.environment.zorn_page,
             self.environment.zorn_settings.url_style,
             self.environment.zorn_settings.debug,
         )
+        if self.environment.zorn_dependencies is not None:
+            self.environment.zorn_dependencies.add_page(the_page.file_name, the_page.title, url)
+        return url
 
 
 class Static(ZornReplacementTag):
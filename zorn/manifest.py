@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+
+
+def hash_content(content):
+    """Return the hash of a piece of content
+
+    :param content: a string or bytes
+    :returns: the hexadecimal digest of the content
+    :rtype: str
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha1(content).hexdigest()
+
+
+def hash_file(path, chunk_size=65536):
+    """Return the hash of the content of a file
+
+    :param path: path to the file
+    :param chunk_size: number of bytes read at a time
+    :returns: the hexadecimal digest of the file's content
+    :rtype: str
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PageDependencies:
+    def __init__(self):
+        """Everything the html of a page was generated from, besides its own markdown and the settings
+
+        Holds the templates loaded while rendering the page (with the hashes of their sources) and the other pages it
+        links to (with the titles and urls resolved for them).
+        """
+        self.templates = {}
+        self.pages = {}
+
+    def add_template(self, name, template_hash):
+        """Register a template loaded while rendering the page
+
+        :param name: the name of the template
+        :param template_hash: the hash of the template's source
+        """
+        self.templates[name] = template_hash
+
+    def add_page(self, file_name, title, url):
+        """Register a page the rendered page links to
+
+        :param file_name: the file name of the linked page
+        :param title: the title of the linked page
+        :param url: the url resolved to the linked page
+        """
+        self.pages[file_name] = [title, url]
+
+    def merge(self, other):
+        """Add the dependencies registered in another object to this one
+
+        :param other: a `PageDependencies` object
+        """
+        self.templates.update(other.templates)
+        self.pages.update(other.pages)
+
+
+class BuildManifest:
+    VERSION = 1
+
+    def __init__(self, path):
+        """Records, for each output of a build, what it was generated from
+
+        The manifest is a json file mapping the path of each generated file (relative to the site directory) to a
+        record - a dictionary with the hashes of everything that output depends on (its markdown, the settings, the
+        templates it loaded and the titles and urls of the pages it links to). If none of these changed then that page
+        doesn't have to be generated again.
+
+        The manifest also keeps the size and modification time of every source file it hashed, so unchanged files don't
+        have to be read again to be hashed.
+
+        :param path: path to the manifest file
+        """
+        self.path = path
+        self.outputs = {}
+        self.sources = {}
+        self._previous_outputs = {}
+        self._previous_sources = {}
+        self.load()
+
+    def load(self):
+        """Load the records of the previous build from the manifest file (if it exists and is readable)"""
+        self._previous_outputs = {}
+        self._previous_sources = {}
+        if os.path.isfile(self.path):
+            try:
+                with open(self.path) as f:
+                    content = json.load(f)
+            except (OSError, ValueError):
+                return
+            if isinstance(content, dict) and content.get('version') == BuildManifest.VERSION:
+                self._previous_outputs = content.get('outputs', {})
+                self._previous_sources = content.get('sources', {})
+
+    def hash_source(self, path):
+        """Return the hash of a source file
+
+        The file is only read if its size or modification time changed since the previous build.
+
+        :param path: path to the source file
+        :returns: the hexadecimal digest of the file or `None` if the file doesn't exist
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        stat_key = [stat.st_mtime_ns, stat.st_size]
+        previous = self._previous_sources.get(path)
+        if previous is not None and previous['stat'] == stat_key:
+            source_hash = previous['hash']
+        else:
+            source_hash = hash_file(path)
+        self.sources[path] = {'stat': stat_key, 'hash': source_hash}
+        return source_hash
+
+    def get_previous(self, output):
+        """Return the record of an output in the previous build
+
+        :param output: the path of the output
+        :returns: the previous record or `None`
+        """
+        return self._previous_outputs.get(output)
+
+    def get_dependents(self, template=None, page=None):
+        """Return the outputs of the current build which depend on a template or on a page
+
+        :param template: the name of a template
+        :param page: the file name of a page
+        :returns: sorted list with the paths of the outputs
+        :rtype: list
+        """
+        dependents = []
+        for output, record in self.outputs.items():
+            if (template is not None and template in record['templates']) or \
+                    (page is not None and page in record['pages']):
+                dependents.append(output)
+        return sorted(dependents)
+
+    def update(self, output, record):
+        """Set the record of an output for the current build
+
+        :param output: the path of the output
+        :param record: the record of the output
+        """
+        self.outputs[output] = record
+
+    def save(self):
+        """Write the records of the current build to the manifest file
+
+        The file is replaced atomically, so an interrupted build never leaves a corrupted manifest behind.
+        """
+        manifest_dir = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.exists(manifest_dir):
+            os.makedirs(manifest_dir)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'version': BuildManifest.VERSION,
+                'outputs': self.outputs,
+                'sources': self.sources,
+            }, f, sort_keys=True, indent=1)
+        os.replace(tmp_path, self.path)
@@ -137,10 +137,29 @@ class AdminParser(Parser):
                 )
             return input_task
 
+        def number_of_jobs(input_jobs):
+            try:
+                jobs = int(input_jobs)
+            except ValueError:
+                jobs = 0
+            if jobs < 1:
+                raise argparse.ArgumentTypeError('The number of jobs has to be a positive integer.')
+            return jobs
+
         self._parser.add_argument('task', help='the admin task you wish to perform', type=available_task)
         self._parser.add_argument(
             '-u', '--update', action='store_true', help='update settings after task is run (if applicable)'
         )
+        self._parser.add_argument(
+            '-f', '--force', action='store_true', help='generate all pages, even the ones which are up to date'
+        )
+        self._parser.add_argument(
+            '-j', '--jobs', type=number_of_jobs, default=1, help='the number of processes generating pages'
+        )
+        self._parser.add_argument(
+            '-p', '--pipeline', action='store_true',
+            help='read, convert, render and write pages at the same time in a pipeline of threads'
+        )
 
     def parse_arguments(self):
         super().parse_arguments()
@@ -153,3 +172,6 @@ class AdminParser(Parser):
         else:
             self.task = getattr(tasks_module, AdminParser.TASKS[input_task])
         self.set_task_argument('update', self._parsed_args.update)
+        self.set_task_argument('force', self._parsed_args.force)
+        self.set_task_argument('jobs', self._parsed_args.jobs)
+        self.set_task_argument('pipeline', self._parsed_args.pipeline)
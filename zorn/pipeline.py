@@ -0,0 +1,104 @@
+import queue
+import sys
+import threading
+
+# Marks the end of the items flowing through a pipeline
+_END = object()
+
+
+class _Failure:
+    def __init__(self, exc_info):
+        """Wraps an exception raised by a stage, so it can travel down the pipeline to the consumer"""
+        self.exc_info = exc_info
+
+
+class Pipeline:
+    QUEUE_SIZE = 16
+
+    def __init__(self, stages, queue_size=QUEUE_SIZE):
+        """Runs items through a sequence of stages, each stage in its own thread
+
+        Consecutive stages are connected by bounded queues, so a stage waiting on disk can overlap with a stage using
+        the CPU, while the number of items in flight never exceeds `(len(stages) + 1) * (queue_size + 1)`, whatever
+        the number of items. Items leave the pipeline in the order they entered it.
+
+        :Example:
+
+            for result in Pipeline([read, convert, write]).run(items):
+                ...
+
+        :param stages: a list of functions - each one takes the output of the previous one (the first one takes the
+            items)
+        :param queue_size: the maximum number of items waiting between two stages
+        """
+        self.stages = stages
+        self.queue_size = queue_size
+        self._stop = threading.Event()
+
+    def _feed(self, items, out_queue):
+        try:
+            for item in items:
+                if self._stop.is_set():
+                    break
+                out_queue.put(item)
+        except Exception:
+            out_queue.put(_Failure(sys.exc_info()))
+        out_queue.put(_END)
+
+    def _work(self, stage, in_queue, out_queue):
+        while True:
+            item = in_queue.get()
+            if item is _END:
+                out_queue.put(_END)
+                return
+            if self._stop.is_set() or isinstance(item, _Failure):
+                out_queue.put(item)
+                continue
+            try:
+                out_queue.put(stage(item))
+            except Exception:
+                out_queue.put(_Failure(sys.exc_info()))
+
+    def run(self, items):
+        """Run the items through the stages
+
+        If a stage raises an exception, no more items are fed to the pipeline and the exception is raised to the
+        consumer once the items before it were consumed.
+
+        :param items: an iterable with the items
+        :returns: generator of the outputs of the last stage
+        """
+        self._stop.clear()
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = [threading.Thread(target=self._feed, args=(items, queues[0]))]
+        for index, stage in enumerate(self.stages):
+            threads.append(threading.Thread(target=self._work, args=(stage, queues[index], queues[index + 1])))
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        try:
+            while True:
+                result = queues[-1].get()
+                if result is _END:
+                    break
+                if isinstance(result, _Failure):
+                    raise result.exc_info[1].with_traceback(result.exc_info[2])
+                yield result
+        finally:
+            self._stop.set()
+            # unblock the stages waiting on full or empty queues until all of them are finished
+            while any(thread.is_alive() for thread in threads):
+                for stage_queue in queues:
+                    try:
+                        while True:
+                            stage_queue.get_nowait()
+                    except queue.Empty:
+                        pass
+                for stage_queue in queues[:-1]:
+                    try:
+                        stage_queue.put_nowait(_END)
+                    except queue.Full:
+                        pass
+                for thread in threads:
+                    thread.join(0.01)
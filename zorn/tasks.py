@@ -316,12 +316,27 @@ class Create(Task):
 
 
 class Generate(AdminTask):
+    def __init__(self, **kwargs):
+        """Extend Admin task
+
+        :param force: if `True`, generate all pages, even the ones the build manifest considers up to date
+        :param jobs: the number of processes generating pages
+        :param pipeline: if `True`, read, convert, render and write pages in a pipeline of threads
+        """
+        super().__init__(**kwargs)
+        self.force = kwargs['force'] if 'force' in kwargs.keys() else False
+        self.jobs = kwargs['jobs'] if 'jobs' in kwargs.keys() else 1
+        self.pipeline = kwargs['pipeline'] if 'pipeline' in kwargs.keys() else False
+
     def run(self):
         """Generate the html of the site"""
         super().run()
         self.communicate(CliColors.RESET + 'Generating... \n')
         website = elements.Website(self.settings)
-        website.generate_pages()
+        website.generate_pages(force=self.force, jobs=self.jobs, pipeline=self.pipeline)
+        self.communicate('{0} pages generated, {1} pages up to date'.format(
+            website.stats['generated'], website.stats['skipped']
+        ), False)
         self.communicate(CliColors.SUCESS + 'Done!' + CliColors.RESET + '\n')
 
 